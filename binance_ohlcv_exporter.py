@@ -30,17 +30,33 @@ from __future__ import annotations
 __version__ = "1.2.0"
 
 import argparse
+import bisect
 import csv
 import datetime as dt
+import gzip
+import json
 import logging
 import os
+import threading
 import time
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import lru_cache
+from operator import attrgetter
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
+try:  # orjson (опційно) парсить великі сторінки klines у рази швидше за stdlib json
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 
 # --- Logging ---
 log = logging.getLogger(__name__)
@@ -50,9 +66,89 @@ log = logging.getLogger(__name__)
 BASE_URL = "https://data-api.binance.vision"
 KLINES_PATH = "/api/v3/klines"
 
+MS_PER_DAY = 86_400_000
+WINDOW_90D_MS = 90 * MS_PER_DAY
+WINDOW_180D_MS = 180 * MS_PER_DAY
+
+# Тривалість свічки для інтервалів Binance (1M має змінну довжину — його тут немає)
+INTERVAL_MS = {
+    "1s": 1_000,
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "2h": 7_200_000,
+    "4h": 14_400_000,
+    "6h": 21_600_000,
+    "8h": 28_800_000,
+    "12h": 43_200_000,
+    "1d": 86_400_000,
+    "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+
+
+DEFAULT_POOL_MAXSIZE = 32
+
+
+def _mount_pool(session: requests.Session, pool_maxsize: int) -> None:
+    """Монтує адаптер із пулом на pool_maxsize з'єднань на хост; retry робимо самі."""
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def _make_session(pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> requests.Session:
+    """
+    Спільна HTTP-сесія з keep-alive: TCP/TLS-з'єднання перевикористовуються між запитами.
+    Пул має бути не меншим за кількість паралельних потоків (--concurrency).
+    """
+    session = requests.Session()
+    # Сторінка з 1000 свічок — сотні KB JSON; просимо стиснення (requests розпаковує сам)
+    session.headers.update({"Accept": "application/json", "Accept-Encoding": "gzip"})
+    _mount_pool(session, pool_maxsize)
+    return session
+
+
+_SESSION = _make_session()
+
+CSV_BUFFER_SIZE = 1 << 20
+
+KLINE_CSV_HEADER = (
+    "open_time_utc",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "close_time_utc",
+    "quote_volume",
+    "trades",
+    "taker_buy_base_volume",
+    "taker_buy_quote_volume",
+)
+
 
 @dataclass(frozen=True)
 class Kline:
+    # __slots__ замість per-instance __dict__: у рази менше пам'яті на свічку і швидший
+    # доступ до атрибутів. Оголошено вручну, бо dataclass(slots=True) є лише з Python 3.10.
+    __slots__ = (
+        "open_time_ms",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "close_time_ms",
+        "quote_volume",
+        "trades",
+        "taker_buy_base_volume",
+        "taker_buy_quote_volume",
+    )
+
     open_time_ms: int
     open: str
     high: str
@@ -65,10 +161,87 @@ class Kline:
     taker_buy_base_volume: str
     taker_buy_quote_volume: str
 
+    # copy/pickle відновлюють слоти через setattr, а frozen його забороняє — тож стан
+    # повертаємо вручну через object.__setattr__ (як робить slots=True з Python 3.10.1).
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: tuple) -> None:
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+
+
+@dataclass
+class KlineColumns:
+    """
+    Колонкове (struct-of-arrays) представлення свічок — лише поля, потрібні для метрик.
+    Числа лежать у компактних array.array замість окремого Python-об'єкта на кожне значення.
+    """
+    open_time_ms: array = field(default_factory=lambda: array("q"))
+    close: array = field(default_factory=lambda: array("d"))
+    volume: array = field(default_factory=lambda: array("d"))
+    quote_volume: array = field(default_factory=lambda: array("d"))
+
+    def __len__(self) -> int:
+        return len(self.open_time_ms)
+
+    def extend(self, klines: Iterable[Kline]) -> None:
+        """Дописує свічки (у порядку зростання часу) в кінець колонок."""
+        # Локальні аліаси append: без пошуку атрибутів self.<col>.append на кожну свічку
+        ot_append = self.open_time_ms.append
+        cl_append = self.close.append
+        vb_append = self.volume.append
+        vq_append = self.quote_volume.append
+        for k in klines:
+            ot_append(k.open_time_ms)
+            cl_append(float(k.close))
+            vb_append(float(k.volume))
+            vq_append(float(k.quote_volume))
+
+    @classmethod
+    def from_klines(cls, klines: Iterable[Kline]) -> "KlineColumns":
+        cols = cls()
+        cols.extend(klines)
+        return cols
+
+
+@lru_cache(maxsize=4096)
+def _utc_date_from_days(days: int) -> str:
+    """
+    Дні від epoch -> "YYYY-MM-DD" (алгоритм civil_from_days Говарда Хіннанта).
+    Кешується: свічки одного дня мають спільний префікс дати.
+    """
+    z = days + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    d = doy - (153 * mp + 2) // 5 + 1
+    m = mp + 3 if mp < 10 else mp - 9
+    y = yoe + era * 400 + (1 if m <= 2 else 0)
+    return f"{y:04d}-{m:02d}-{d:02d}"
+
+
+# Спільний для всіх символів/інтервалів кеш ms -> рядок: свічки різних символів мають ті самі
+# open/close часи, тож після першого символу майже всі звернення — влучання.
+_ISO_CACHE: dict[int, str] = {}
+_ISO_CACHE_MAX = 200_000
+
 
 def ms_to_utc_iso(ms: int) -> str:
     """Конвертація Unix ms -> ISO-8601 UTC (без мілісекунд для компактності)."""
-    return dt.datetime.fromtimestamp(ms / 1000, tz=dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    s = _ISO_CACHE.get(ms)
+    if s is None:
+        # Промах: чиста цілочисельна арифметика — без datetime.fromtimestamp/strftime
+        days, sec = divmod(ms // 1000, 86400)
+        h, rem = divmod(sec, 3600)
+        mi, se = divmod(rem, 60)
+        s = f"{_utc_date_from_days(days)} {h:02d}:{mi:02d}:{se:02d}"
+        if len(_ISO_CACHE) >= _ISO_CACHE_MAX:
+            _ISO_CACHE.clear()  # дрібні інтервали на довгому вікні не мають роздувати пам'ять
+        _ISO_CACHE[ms] = s
+    return s
 
 
 def _load_symbols_file(path: str) -> list[str]:
@@ -95,7 +268,10 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--end", type=str, default=None, help="Кінець UTC: YYYY-MM-DD або YYYY-MM-DDTHH:MM:SS")
     p.add_argument("--out", type=str, default="out", help="Папка для CSV.")
     p.add_argument("--timeout", type=int, default=20, help="Таймаут HTTP (сек).")
-    p.add_argument("--sleep", type=float, default=0.15, help="Пауза між сторінками запитів (сек, за замовчуванням 0.15).")
+    p.add_argument("--sleep", type=float, default=0.0, help="Додаткова пауза між сторінками запитів (сек, за замовчуванням 0).")
+    p.add_argument("--max-weight", type=int, default=1000, help="Бюджет ваги запитів за хвилину (X-MBX-USED-WEIGHT-1M), після якого чекаємо.")
+    p.add_argument("--cache-dir", type=str, default=None, help="Папка кешу сирих свічок; повторні запуски докачують лише хвіст.")
+    p.add_argument("--concurrency", type=int, default=4, help="Кількість символів, що завантажуються паралельно (за замовчуванням 4).")
     return p.parse_args()
 
 
@@ -124,21 +300,72 @@ def get_range(days: int, start: Optional[str], end: Optional[str]) -> Tuple[int,
     return int(start_dt.timestamp() * 1000), int(end_dt.timestamp() * 1000)
 
 
+class _WeightLimiter:
+    """
+    Адаптивний rate-limiter за заголовком X-MBX-USED-WEIGHT-1M, спільний для всіх потоків.
+    Binance повертає вагу, вже використану IP за поточну хвилину; поки її менше за
+    max_weight_1m — запити йдуть без пауз, інакше чекаємо початку наступної хвилини.
+    """
+
+    def __init__(self, max_weight_1m: int = 1000) -> None:
+        self.max_weight_1m = max_weight_1m
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def observe(self, headers) -> None:
+        """Запам'ятовує використану вагу з заголовків відповіді."""
+        try:
+            used = int(headers.get("X-MBX-USED-WEIGHT-1M"))
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._used = used
+
+    def wait(self) -> None:
+        """Блокує до нової хвилини, якщо бюджет ваги вичерпано."""
+        with self._lock:
+            used = self._used
+        if used < self.max_weight_1m:
+            return
+        delay = 60.0 - time.time() % 60.0
+        log.warning("request weight %d/%d used, pausing %.1fs…", used, self.max_weight_1m, delay)
+        time.sleep(delay)
+        with self._lock:
+            self._used = 0
+
+
+_LIMITER = _WeightLimiter()
+
+
+def _retry_after_sec(response, default: int) -> int:
+    """Секунди з заголовка Retry-After (Binance надсилає його з 418/429), інакше default."""
+    try:
+        return int(response.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+
 def _request_with_retry(
     url: str,
     params: dict[str, str | int],
     timeout: int,
     retries: int = 3,
+    session: Optional[requests.Session] = None,
 ) -> list:
     """
     HTTP GET з retry + exponential backoff.
     Повертає розпарсений JSON (список).
+    За замовчуванням використовує спільну сесію модуля (keep-alive).
     """
+    if session is None:
+        session = _SESSION
     for attempt in range(1, retries + 1):
+        _LIMITER.wait()
         try:
-            r = requests.get(url, params=params, timeout=timeout)
+            r = session.get(url, params=params, timeout=timeout)
+            _LIMITER.observe(r.headers)
             r.raise_for_status()
-            return r.json()
+            return _json_loads(r.content)
         except (requests.ConnectionError, requests.Timeout) as exc:
             if attempt == retries:
                 raise
@@ -146,33 +373,96 @@ def _request_with_retry(
             log.warning("network error (%s), retry %d/%d in %ds…", exc, attempt, retries, wait)
             time.sleep(wait)
         except requests.HTTPError as exc:
-            if exc.response is not None and exc.response.status_code == 429:
-                wait = 2 ** attempt
-                log.warning("rate-limited (429), retry %d/%d in %ds…", attempt, retries, wait)
-                time.sleep(wait)
-            else:
+            # 429 — перевищено ліміт; 418 — IP тимчасово забанено після ігнорування 429
+            status = exc.response.status_code if exc.response is not None else None
+            if status not in (418, 429) or attempt == retries:
                 raise
+            wait = _retry_after_sec(exc.response, default=2 ** attempt)
+            log.warning("rate-limited (%d), retry %d/%d in %ds…", status, attempt, retries, wait)
+            time.sleep(wait)
     return []  # unreachable, kept for type-checker
 
 
-def fetch_klines(
+def _kline_cache_path(cache_dir: str, symbol: str, interval: str) -> str:
+    return os.path.join(cache_dir, f"{symbol}_{interval}.json.gz")
+
+
+def _load_kline_cache(path: str) -> Optional[dict]:
+    """
+    Читає кеш сирих рядків klines: {"start_ms": ..., "rows": [...]}.
+    Відсутній чи пошкоджений файл — це просто промах кешу (None).
+    """
+    try:
+        with gzip.open(path, "rb") as f:
+            cached = _json_loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        log.warning("ignoring unreadable cache %s: %s", path, exc)
+        return None
+    if not isinstance(cached, dict) or not cached.get("rows") or not isinstance(cached.get("start_ms"), int):
+        log.warning("ignoring malformed cache %s", path)
+        return None
+    return cached
+
+
+def _save_kline_cache(path: str, start_ms: int, rows: list) -> None:
+    """Атомарно зберігає кеш (gzip JSON): пишемо у .part і перейменовуємо."""
+    tmp_path = f"{path}.part"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump({"start_ms": start_ms, "rows": rows}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def iter_kline_pages(
     symbol: str,
     interval: str,
     start_ms: int,
     end_ms: int,
     timeout: int,
-    sleep_sec: float = 0.15,
-) -> List[Kline]:
+    sleep_sec: float = 0.0,
+    cache_dir: Optional[str] = None,
+) -> Iterator[List[Kline]]:
     """
     Завантажує klines через /api/v3/klines з пагінацією (limit=1000).
-    Повертає список Kline, відсортований за часом зростання.
+    Віддає сторінки (списки Kline) по мірі надходження — у порядку зростання часу,
+    без дублів і без свічок після end_ms.
+
+    Якщо задано cache_dir — закриті свічки зберігаються у <cache_dir>/<SYMBOL>_<interval>.json.gz,
+    і наступні запуски докачують лише хвіст після останньої збереженої свічки.
     """
-    out: List[Kline] = []
     limit = 1000
     url = f"{BASE_URL}{KLINES_PATH}"
+    step_ms = INTERVAL_MS.get(interval, 1)
     next_start = start_ms
-
-    while True:
+    # Binance віддає свічки за зростанням часу, а сторінки йдуть по черзі, тож дублікати
+    # можливі лише на стиках сторінок — достатньо порівнювати з останнім доданим open_time.
+    last_ts = -1
+
+    cache_path: Optional[str] = None
+    cached_rows: list = []
+    new_rows: list = []
+    now_ms = int(time.time() * 1000)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = _kline_cache_path(cache_dir, symbol, interval)
+        cached = _load_kline_cache(cache_path)
+        # Кеш безперервний від свого start_ms до останньої свічки, тож годиться лише якщо
+        # початок вікна лежить усередині нього або одразу після — інакше між кешем і вікном
+        # була б дірка, і збережений кеш перестав би бути безперервним.
+        if (
+            cached is not None
+            and cached["start_ms"] <= start_ms <= cached["rows"][-1][0] + step_ms
+        ):
+            cached_rows = cached["rows"]
+            page = [Kline(*row[:11]) for row in cached_rows if start_ms <= row[0] <= end_ms]
+            if page:
+                last_ts = page[-1].open_time_ms
+                yield page
+            next_start = max(start_ms, cached_rows[-1][0] + step_ms)
+            log.info("  cache: %s %s — %d rows, resuming from %s", symbol, interval, len(page), ms_to_utc_iso(next_start))
+
+    while next_start <= end_ms:
         params: dict[str, str | int] = {
             "symbol": symbol,
             "interval": interval,
@@ -185,83 +475,134 @@ def fetch_klines(
         if not data:
             break
 
-        # Парсимо відповідь
+        # Парсимо відповідь. Ціни/обсяги лишаємо рядками з API як є (точність без втрат,
+        # без float() тут і форматування при записі); часи й trades JSON уже дає як int.
+        # Порядок полів Kline збігається з порядком колонок API.
+        page = []
         for row in data:
-            out.append(
-                Kline(
-                    open_time_ms=int(row[0]),
-                    open=row[1],
-                    high=row[2],
-                    low=row[3],
-                    close=row[4],
-                    volume=row[5],
-                    close_time_ms=int(row[6]),
-                    quote_volume=row[7],
-                    trades=int(row[8]),
-                    taker_buy_base_volume=row[9],
-                    taker_buy_quote_volume=row[10],
-                )
-            )
-
-        last_open = int(data[-1][0])
-        # Якщо остання свічка вже дійшла до end_ms або повернули < limit — виходимо.
-        if last_open >= end_ms or len(data) < limit:
+            open_time_ms = row[0]
+            if open_time_ms <= last_ts:
+                continue  # дубль на стику сторінок
+            if open_time_ms > end_ms:
+                break  # зайвий хвіст після end_ms
+            last_ts = open_time_ms
+            page.append(Kline(*row[:11]))
+            # У кеш — лише закриті свічки (поточна ще змінюється)
+            if cache_path is not None and row[6] < now_ms:
+                new_rows.append(row)
+        if page:
+            yield page
+
+        last_open = data[-1][0]
+        # Наступна сторінка починається з наступної свічки (для невідомих інтервалів: +1 ms)
+        next_start = last_open + step_ms
+        # Якщо повернули < limit або наступна свічка вже після end_ms — більше даних немає,
+        # зайвий запит (що повернув би порожню сторінку) не робимо.
+        if len(data) < limit or next_start > end_ms:
             break
 
-        # Наступна сторінка: +1 ms, щоб уникнути дубля
-        next_start = last_open + 1
+        # Rate-limit веде _LIMITER за вагою з заголовків; фіксована пауза — лише на вимогу
+        if sleep_sec > 0:
+            time.sleep(sleep_sec)
 
-        # Rate-limit: керована пауза між сторінками
-        time.sleep(sleep_sec)
+    if cache_path is not None:
+        # Зберігаємо лише рядки від початку поточного вікна: при ковзному вікні (щоденний cron)
+        # кеш не росте вічно. Запуск із ранішим стартом і так є промахом кешу.
+        kept_rows = [row for row in cached_rows if row[0] >= start_ms]
+        if new_rows or len(kept_rows) != len(cached_rows):
+            rows = kept_rows + new_rows
+            if rows:
+                _save_kline_cache(cache_path, start_ms, rows)
 
-    # У Binance інколи можуть бути дублікати на стиках; зачистимо:
-    dedup: dict[int, Kline] = {}
-    for k in out:
-        dedup[k.open_time_ms] = k
-    out_sorted = [dedup[t] for t in sorted(dedup.keys())]
 
-    # Відрізаємо по end_ms (на випадок зайвого хвоста)
-    out_sorted = [k for k in out_sorted if k.open_time_ms <= end_ms]
-    return out_sorted
+def fetch_klines(
+    symbol: str,
+    interval: str,
+    start_ms: int,
+    end_ms: int,
+    timeout: int,
+    sleep_sec: float = 0.0,
+    cache_dir: Optional[str] = None,
+) -> List[Kline]:
+    """
+    Завантажує klines через /api/v3/klines з пагінацією (limit=1000).
+    Повертає список Kline, відсортований за часом зростання.
+    """
+    pages = iter_kline_pages(symbol, interval, start_ms, end_ms, timeout, sleep_sec, cache_dir)
+    return [k for page in pages for k in page]
+
+
+_kline_values = attrgetter(
+    "open_time_ms",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "close_time_ms",
+    "quote_volume",
+    "trades",
+    "taker_buy_base_volume",
+    "taker_buy_quote_volume",
+)
+
+
+def _kline_csv_row(k: Kline, _get=_kline_values, _iso=ms_to_utc_iso) -> tuple:
+    """Kline -> рядок CSV. Поля дістає один attrgetter; ціни/обсяги вже є рядками з API."""
+    ot, o, h, lo, c, v, ct, qv, n, tbb, tbq = _get(k)
+    return (_iso(ot), o, h, lo, c, v, _iso(ct), qv, n, tbb, tbq)
+
+
+def write_kline_pages(
+    path: str,
+    pages: Iterable[Iterable[Kline]],
+    cols: Optional[KlineColumns] = None,
+) -> int:
+    """
+    Потоково записує сторінки klines у CSV — кожна сторінка пишеться одразу, як надійшла,
+    тож диск працює під час очікування мережі, а весь ряд у пам'яті не накопичується.
+    Сторінкою може бути будь-який iterable; якщо передано cols — паралельно наповнює
+    колонки для метрик (тоді сторінки мають бути списками, бо читаються двічі).
+    Пише у <path>.part і перейменовує лише після успіху. Повертає кількість рядків.
+    """
+    n_rows = 0
+
+    def csv_rows(page: Iterable[Kline]) -> Iterator[tuple]:
+        # Рахуємо рядки по ходу запису — len() є не в кожного iterable
+        nonlocal n_rows
+        for k in page:
+            n_rows += 1
+            yield _kline_csv_row(k)
+
+    tmp_path = f"{path}.part"
+    try:
+        # 1 MiB буфер: рядок ~140 байт, тож замість сотень дрібних write() — кілька великих
+        with open(tmp_path, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f:
+            w = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+            w.writerow(KLINE_CSV_HEADER)
+            for page in pages:
+                # csv.writer реалізований на C: віддаємо йому всю сторінку одним writerows()
+                w.writerows(csv_rows(page))
+                if cols is not None:
+                    cols.extend(page)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Не лишаємо обрізаний файл, якщо завантаження впало посередині
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return n_rows
+
+
+def write_klines_csv(path: str, klines: Iterable[Kline]) -> None:
+    """Записує klines у CSV."""
+    write_kline_pages(path, [klines])
 
 
-def write_klines_csv(path: str, klines: List[Kline]) -> None:
-    """Записує klines у CSV."""
-    header = [
-        "open_time_utc",
-        "open",
-        "high",
-        "low",
-        "close",
-        "volume",
-        "close_time_utc",
-        "quote_volume",
-        "trades",
-        "taker_buy_base_volume",
-        "taker_buy_quote_volume",
-    ]
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(header)
-        for k in klines:
-            w.writerow(
-                [
-                    ms_to_utc_iso(k.open_time_ms),
-                    k.open,
-                    k.high,
-                    k.low,
-                    k.close,
-                    k.volume,
-                    ms_to_utc_iso(k.close_time_ms),
-                    k.quote_volume,
-                    k.trades,
-                    k.taker_buy_base_volume,
-                    k.taker_buy_quote_volume,
-                ]
-            )
-
-
-def calc_metrics(symbol: str, klines_1h: List[Kline]) -> Tuple[float, float, float, float]:
+def calc_metrics(
+    symbol: str,
+    klines_1h: Union[List[Kline], KlineColumns],
+) -> Tuple[float, float, float, float]:
     """
     Рахує:
     - % зміни ціни за 90d і 180d (за close)
@@ -269,41 +610,81 @@ def calc_metrics(symbol: str, klines_1h: List[Kline]) -> Tuple[float, float, flo
 
     Примітка: 90d/180d — за "найближчою доступною" свічкою на старті вікна.
     """
-    if not klines_1h:
+    cols = klines_1h if isinstance(klines_1h, KlineColumns) else KlineColumns.from_klines(klines_1h)
+    if not len(cols):
         return float("nan"), float("nan"), float("nan"), float("nan")
 
-    # Допоміжна функція: знайти close "на або після" target_time
-    def close_at_or_after(target_ms: int) -> float:
-        for k in klines_1h:
-            if k.open_time_ms >= target_ms:
-                return float(k.close)
-        return float(klines_1h[-1].close)
-
-    end_ms = klines_1h[-1].open_time_ms
-    c_end = float(klines_1h[-1].close)
+    # Свічки відсортовані за open_time_ms — шукаємо "на або після" target через bisect
+    times = cols.open_time_ms
+    close = cols.close
+    last_idx = len(times) - 1
 
-    ms_90 = end_ms - int(90 * 24 * 3600 * 1000)
-    ms_180 = end_ms - int(180 * 24 * 3600 * 1000)
+    end_ms = times[-1]
+    c_end = close[-1]
 
-    c_90 = close_at_or_after(ms_90)
-    c_180 = close_at_or_after(ms_180)
+    # 180d-межа не пізніша за 90d, тож її позиція — нижня межа для другого пошуку
+    i180 = bisect.bisect_left(times, end_ms - WINDOW_180D_MS)
+    i90 = bisect.bisect_left(times, end_ms - WINDOW_90D_MS, lo=i180)
+    c_90 = close[min(i90, last_idx)]
+    c_180 = close[min(i180, last_idx)]
 
     ch90 = (c_end / c_90 - 1.0) * 100.0 if c_90 else float("nan")
     ch180 = (c_end / c_180 - 1.0) * 100.0 if c_180 else float("nan")
 
-    # Середній денний обсяг: групуємо по YYYY-MM-DD (UTC)
-    day_b: dict[str, float] = {}
-    day_q: dict[str, float] = {}
-    for k in klines_1h:
-        day = ms_to_utc_iso(k.open_time_ms)[:10]
-        day_b[day] = day_b.get(day, 0.0) + float(k.volume)
-        day_q[day] = day_q.get(day, 0.0) + float(k.quote_volume)
-
-    avg_b = sum(day_b.values()) / len(day_b) if day_b else float("nan")
-    avg_q = sum(day_q.values()) / len(day_q) if day_q else float("nan")
+    # Середній денний обсяг = сума обсягів / кількість UTC-днів, що мають свічки.
+    # День рахуємо цілочисельно (ms // доба) — без форматування дати на кожну свічку.
+    n_days = len({t // MS_PER_DAY for t in times})
+    avg_b = sum(cols.volume) / n_days
+    avg_q = sum(cols.quote_volume) / n_days
     return ch90, ch180, avg_b, avg_q
 
 
+def export_symbol(
+    symbol: str,
+    intervals: List[str],
+    start_ms: int,
+    end_ms: int,
+    out_root: str,
+    timeout: int,
+    sleep_sec: float,
+    pbar: Optional[tqdm] = None,
+    cache_dir: Optional[str] = None,
+) -> Optional[list[str]]:
+    """
+    Експортує всі інтервали одного символу у CSV.
+    Повертає рядок для summary_metrics.csv (або None, якщо 1h не запитували).
+    """
+    log.info("Fetching %s …", symbol)
+    # Для метрик тримаємо лише компактні колонки 1h, а не списки Kline усіх інтервалів
+    cols_1h: Optional[KlineColumns] = None
+    done_intervals = 0
+
+    try:
+        for interval in intervals:
+            # Пишемо CSV по мірі надходження сторінок, а колонки 1h наповнюємо паралельно
+            cols = KlineColumns() if interval == "1h" else None
+            pages = iter_kline_pages(symbol, interval, start_ms, end_ms, timeout, sleep_sec, cache_dir)
+
+            out_csv = os.path.join(out_root, f"klines_{interval}", f"{symbol}_{interval}.csv")
+            n_rows = write_kline_pages(out_csv, pages, cols)
+            if cols is not None:
+                cols_1h = cols
+            log.info("  saved: %s (%d rows)", out_csv, n_rows)
+            if pbar is not None:
+                pbar.update(1)
+            done_intervals += 1
+    except Exception:
+        # Прогрес-бар має дійти до кінця навіть якщо символ впав
+        if pbar is not None:
+            pbar.update(len(intervals) - done_intervals)
+        raise
+
+    if cols_1h is None:
+        return None
+    ch90, ch180, avg_b, avg_q = calc_metrics(symbol, cols_1h)
+    return [symbol, f"{ch90:.6f}", f"{ch180:.6f}", f"{avg_b:.10f}", f"{avg_q:.10f}"]
+
+
 def main() -> None:
     logging.basicConfig(
         level=logging.INFO,
@@ -324,6 +705,11 @@ def main() -> None:
         raise SystemExit(1)
 
     start_ms, end_ms = get_range(args.days, args.start, args.end)
+    _LIMITER.max_weight_1m = args.max_weight
+    concurrency = max(1, args.concurrency)
+    # Кожен потік тримає по з'єднанню: менший пул змусив би urllib3 викидати зайві з'єднання
+    if concurrency > DEFAULT_POOL_MAXSIZE:
+        _mount_pool(_SESSION, concurrency)
 
     out_root = args.out
     os.makedirs(out_root, exist_ok=True)
@@ -338,32 +724,49 @@ def main() -> None:
     total_jobs = len(symbols) * len(args.intervals)
     pbar = tqdm(total=total_jobs, desc="Exporting", unit="job")
 
-    failed: list[str] = []
-
+    # HTTP — це чисте очікування I/O, тож символи качаємо паралельно в потоках
+    # (пагінація всередині одного symbol/interval лишається послідовною).
+    results: dict[str, Optional[list[str]]] = {}
+    failed_set: set[str] = set()
+
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = {
+            pool.submit(
+                export_symbol,
+                symbol,
+                args.intervals,
+                start_ms,
+                end_ms,
+                out_root,
+                args.timeout,
+                args.sleep,
+                pbar,
+                args.cache_dir,
+            ): symbol
+            for symbol in symbols
+        }
+        for fut in as_completed(futures):
+            symbol = futures[fut]
+            try:
+                results[symbol] = fut.result()
+            except Exception as exc:  # noqa: BLE001
+                log.error("⚠ %s failed: %s — skipping", symbol, exc)
+                failed_set.add(symbol)
+    except BaseException:
+        # Ctrl-C (чи інша фатальна помилка): скасовуємо ще не розпочаті символи, а не чекаємо,
+        # поки `with` дочекається всієї черги; активні потоки лише доходять до кінця.
+        pool.shutdown(wait=False, cancel_futures=True)
+        pbar.close()
+        raise
+    pool.shutdown()
+
+    # Зберігаємо порядок символів із CLI / файлу
+    failed = [s for s in symbols if s in failed_set]
     for symbol in symbols:
-        log.info("Fetching %s …", symbol)
-        try:
-            klines_by_interval: dict[str, List[Kline]] = {}
-            done_intervals = 0
-
-            for interval in args.intervals:
-                kl = fetch_klines(symbol, interval, start_ms, end_ms, args.timeout, args.sleep)
-                klines_by_interval[interval] = kl
-
-                out_csv = os.path.join(out_root, f"klines_{interval}", f"{symbol}_{interval}.csv")
-                write_klines_csv(out_csv, kl)
-                log.info("  saved: %s (%d rows)", out_csv, len(kl))
-                pbar.update(1)
-                done_intervals += 1
-
-            if "1h" in klines_by_interval:
-                ch90, ch180, avg_b, avg_q = calc_metrics(symbol, klines_by_interval["1h"])
-                summary_rows.append([symbol, f"{ch90:.6f}", f"{ch180:.6f}", f"{avg_b:.10f}", f"{avg_q:.10f}"])
-
-        except Exception as exc:  # noqa: BLE001
-            log.error("⚠ %s failed: %s — skipping", symbol, exc)
-            failed.append(symbol)
-            pbar.update(len(args.intervals) - done_intervals)
+        row = results.get(symbol)
+        if row is not None:
+            summary_rows.append(row)
 
     pbar.close()
 
@@ -6,9 +6,13 @@ Run:  python -m pytest tests/ -v
 
 from __future__ import annotations
 
+import copy
 import csv
+import gzip
+import json
 import math
 import os
+import pickle
 import sys
 import tempfile
 from unittest.mock import MagicMock, patch
@@ -70,6 +74,34 @@ class TestMsToUtcIso:
         assert exp.ms_to_utc_iso(1_718_452_800_000) == "2024-06-15 12:00:00"
 
 
+    def test_leap_day(self):
+        # 2024-02-29 23:00:00 UTC = 1709247600000 ms
+        assert exp.ms_to_utc_iso(1_709_247_600_000) == "2024-02-29 23:00:00"
+
+    def test_truncates_milliseconds(self):
+        # close_time of the first 1h candle: 00:59:59.999
+        assert exp.ms_to_utc_iso(3_599_999) == "1970-01-01 00:59:59"
+
+    def test_matches_datetime_across_years(self):
+        import datetime as dt
+        for ms in range(0, 4_102_444_800_000, 86_399_999 * 37):
+            ref = dt.datetime.fromtimestamp(ms / 1000, tz=dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            assert exp.ms_to_utc_iso(ms) == ref
+
+    def test_cached_value_is_reused(self):
+        exp._ISO_CACHE.clear()
+        first = exp.ms_to_utc_iso(1_704_067_200_000)
+        assert exp._ISO_CACHE[1_704_067_200_000] == first
+        assert exp.ms_to_utc_iso(1_704_067_200_000) is first
+
+    def test_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(exp, "_ISO_CACHE_MAX", 3)
+        exp._ISO_CACHE.clear()
+        for h in range(10):
+            exp.ms_to_utc_iso(h * 3_600_000)
+        assert len(exp._ISO_CACHE) <= 3
+        assert exp.ms_to_utc_iso(9 * 3_600_000) == "1970-01-01 09:00:00"
+
 # ---------------------------------------------------------------------------
 # parse_dt_utc
 # ---------------------------------------------------------------------------
@@ -150,6 +182,17 @@ class TestKline:
         with pytest.raises(AttributeError):
             k.open = "999.0"  # type: ignore[misc]
 
+    def test_uses_slots(self):
+        k = _make_kline()
+        assert not hasattr(k, "__dict__")
+        assert k.close == "105.0"
+
+    def test_copy_and_pickle_round_trip(self):
+        k = _make_kline(open_time_ms=3_600_000, close="0.00000002")
+        assert copy.copy(k) == k
+        assert copy.deepcopy(k) == k
+        assert pickle.loads(pickle.dumps(k)) == k
+
     def test_fields_are_strings(self):
         k = _make_kline(open="0.00000001", close="0.00000002")
         assert isinstance(k.open, str)
@@ -157,6 +200,35 @@ class TestKline:
         assert k.open == "0.00000001"
 
 
+# ---------------------------------------------------------------------------
+# KlineColumns
+# ---------------------------------------------------------------------------
+
+class TestKlineColumns:
+    def test_from_klines(self):
+        cols = exp.KlineColumns.from_klines([
+            _make_kline(open_time_ms=0, close="1.5", volume="10", quote_volume="15"),
+            _make_kline(open_time_ms=3_600_000, close="2.5", volume="20", quote_volume="50"),
+        ])
+        assert len(cols) == 2
+        assert list(cols.open_time_ms) == [0, 3_600_000]
+        assert list(cols.close) == [1.5, 2.5]
+        assert list(cols.volume) == [10.0, 20.0]
+        assert list(cols.quote_volume) == [15.0, 50.0]
+
+    def test_extend_appends_in_order(self):
+        cols = exp.KlineColumns.from_klines([_make_kline(open_time_ms=0, close="1")])
+        cols.extend(iter([_make_kline(open_time_ms=3_600_000, close="2")]))
+        assert list(cols.open_time_ms) == [0, 3_600_000]
+        assert list(cols.close) == [1.0, 2.0]
+
+    def test_calc_metrics_accepts_columns(self):
+        klines = [
+            _make_kline(open_time_ms=h * 3_600_000, close=str(100 + h), volume="1.0", quote_volume="2.0")
+            for h in range(48)
+        ]
+        assert exp.calc_metrics("X", exp.KlineColumns.from_klines(klines)) == exp.calc_metrics("X", klines)
+
 # ---------------------------------------------------------------------------
 # write_klines_csv
 # ---------------------------------------------------------------------------
@@ -204,6 +276,31 @@ class TestWriteKlinesCsv:
         assert len(reader) == 1  # header only
 
 
+    def test_accepts_generator(self, tmp_path):
+        csv_path = str(tmp_path / "gen.csv")
+        exp.write_klines_csv(csv_path, (_make_kline(open_time_ms=h * 3_600_000) for h in range(3)))
+
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            reader = list(csv.reader(f))
+        assert len(reader) == 4
+
+    def test_write_kline_pages_streams_and_fills_columns(self, tmp_path):
+        csv_path = str(tmp_path / "pages.csv")
+        pages = [
+            [_make_kline(open_time_ms=0, close="1.0")],
+            [_make_kline(open_time_ms=3_600_000, close="2.0"), _make_kline(open_time_ms=7_200_000, close="3.0")],
+        ]
+        cols = exp.KlineColumns()
+
+        n_rows = exp.write_kline_pages(csv_path, iter(pages), cols)
+
+        assert n_rows == 3
+        assert list(cols.close) == [1.0, 2.0, 3.0]
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            reader = list(csv.reader(f))
+        assert len(reader) == 4
+        assert not os.path.exists(csv_path + ".part")
+
 # ---------------------------------------------------------------------------
 # calc_metrics
 # ---------------------------------------------------------------------------
@@ -256,6 +353,19 @@ class TestCalcMetrics:
         assert abs(ch90) < 0.0001
         assert abs(ch180) < 0.0001
 
+    def test_change_uses_first_close_at_or_after_target(self):
+        """A gap at the 90d boundary must pick the next available candle."""
+        ms_per_day = 86_400_000
+        klines = [
+            _make_kline(open_time_ms=0, close="50.0"),
+            # nothing on day 10 (the 90d target) — next candle is day 20
+            _make_kline(open_time_ms=20 * ms_per_day, close="80.0"),
+            _make_kline(open_time_ms=100 * ms_per_day, close="100.0"),
+        ]
+        ch90, ch180, _, _ = exp.calc_metrics("GAP", klines)
+        assert abs(ch90 - 25.0) < 1e-9  # 100 / 80 - 1
+        assert abs(ch180 - 100.0) < 1e-9  # 100 / 50 - 1
+
     def test_avg_volume_calculation(self):
         """Two days of data with known volumes."""
         klines = []
@@ -279,15 +389,28 @@ class TestCalcMetrics:
         assert abs(avg_q - 180000.0) < 0.01
 
 
+    def test_avg_volume_skips_days_without_candles(self):
+        """Only UTC days that actually have candles count towards the average."""
+        ms_per_day = 86_400_000
+        klines = [
+            _make_kline(open_time_ms=0, volume="100.0", quote_volume="1000.0"),
+            _make_kline(open_time_ms=3_600_000, volume="100.0", quote_volume="1000.0"),
+            # day 1 is missing entirely
+            _make_kline(open_time_ms=2 * ms_per_day, volume="400.0", quote_volume="4000.0"),
+        ]
+        _, _, avg_b, avg_q = exp.calc_metrics("GAP", klines)
+        assert abs(avg_b - 300.0) < 1e-9
+        assert abs(avg_q - 3000.0) < 1e-9
+
 # ---------------------------------------------------------------------------
 # _request_with_retry (mocked)
 # ---------------------------------------------------------------------------
 
 class TestRequestWithRetry:
-    @patch("binance_ohlcv_exporter.requests.get")
+    @patch("binance_ohlcv_exporter._SESSION.get")
     def test_success_first_try(self, mock_get):
         mock_resp = MagicMock()
-        mock_resp.json.return_value = [["data"]]
+        mock_resp.content = b'[["data"]]'
         mock_resp.raise_for_status.return_value = None
         mock_get.return_value = mock_resp
 
@@ -296,12 +419,12 @@ class TestRequestWithRetry:
         assert mock_get.call_count == 1
 
     @patch("binance_ohlcv_exporter.time.sleep")
-    @patch("binance_ohlcv_exporter.requests.get")
+    @patch("binance_ohlcv_exporter._SESSION.get")
     def test_retries_on_connection_error(self, mock_get, mock_sleep):
         import requests as req
 
         mock_resp = MagicMock()
-        mock_resp.json.return_value = [["ok"]]
+        mock_resp.content = b'[["ok"]]'
         mock_resp.raise_for_status.return_value = None
 
         mock_get.side_effect = [
@@ -315,7 +438,7 @@ class TestRequestWithRetry:
         mock_sleep.assert_called_once()
 
     @patch("binance_ohlcv_exporter.time.sleep")
-    @patch("binance_ohlcv_exporter.requests.get")
+    @patch("binance_ohlcv_exporter._SESSION.get")
     def test_raises_after_max_retries(self, mock_get, mock_sleep):
         import requests as req
 
@@ -326,7 +449,7 @@ class TestRequestWithRetry:
         assert mock_get.call_count == 2
 
     @patch("binance_ohlcv_exporter.time.sleep")
-    @patch("binance_ohlcv_exporter.requests.get")
+    @patch("binance_ohlcv_exporter._SESSION.get")
     def test_retries_on_429(self, mock_get, mock_sleep):
         import requests as req
 
@@ -336,7 +459,7 @@ class TestRequestWithRetry:
         http_err = req.HTTPError(response=resp_429)
 
         mock_resp = MagicMock()
-        mock_resp.json.return_value = [["ok"]]
+        mock_resp.content = b'[["ok"]]'
         mock_resp.raise_for_status.return_value = None
 
         mock_get.side_effect = [http_err, mock_resp]
@@ -346,7 +469,7 @@ class TestRequestWithRetry:
         assert mock_get.call_count == 2
         mock_sleep.assert_called_once()
 
-    @patch("binance_ohlcv_exporter.requests.get")
+    @patch("binance_ohlcv_exporter._SESSION.get")
     def test_raises_non_429_http_error(self, mock_get):
         import requests as req
 
@@ -362,6 +485,74 @@ class TestRequestWithRetry:
         assert mock_get.call_count == 1
 
 
+    @patch("binance_ohlcv_exporter.time.sleep")
+    @patch("binance_ohlcv_exporter._SESSION.get")
+    def test_429_honours_retry_after(self, mock_get, mock_sleep):
+        import requests as req
+
+        resp_429 = MagicMock()
+        resp_429.status_code = 429
+        resp_429.headers = {"Retry-After": "7"}
+
+        mock_resp = MagicMock()
+        mock_resp.content = b'[["ok"]]'
+        mock_resp.headers = {}
+
+        mock_get.side_effect = [req.HTTPError(response=resp_429), mock_resp]
+
+        assert exp._request_with_retry("http://test", {}, timeout=10, retries=3) == [["ok"]]
+        mock_sleep.assert_called_once_with(7)
+
+    @patch("binance_ohlcv_exporter.time.sleep")
+    @patch("binance_ohlcv_exporter._SESSION.get")
+    def test_429_on_last_attempt_raises(self, mock_get, mock_sleep):
+        import requests as req
+
+        resp_429 = MagicMock()
+        resp_429.status_code = 429
+        resp_429.headers = {}
+        mock_get.side_effect = req.HTTPError(response=resp_429)
+
+        with pytest.raises(req.HTTPError):
+            exp._request_with_retry("http://test", {}, timeout=10, retries=2)
+        assert mock_get.call_count == 2
+
+    def test_uses_given_session(self):
+        session = MagicMock()
+        session.get.return_value.content = b'[["s"]]'
+
+        result = exp._request_with_retry("http://test", {}, timeout=10, session=session)
+        assert result == [["s"]]
+        session.get.assert_called_once_with("http://test", params={}, timeout=10)
+
+# ---------------------------------------------------------------------------
+# _WeightLimiter
+# ---------------------------------------------------------------------------
+
+class TestWeightLimiter:
+    @patch("binance_ohlcv_exporter.time.sleep")
+    def test_no_wait_under_budget(self, mock_sleep):
+        limiter = exp._WeightLimiter(max_weight_1m=100)
+        limiter.observe({"X-MBX-USED-WEIGHT-1M": "99"})
+        limiter.wait()
+        mock_sleep.assert_not_called()
+
+    @patch("binance_ohlcv_exporter.time.sleep")
+    def test_waits_for_next_minute_when_budget_used(self, mock_sleep):
+        limiter = exp._WeightLimiter(max_weight_1m=100)
+        limiter.observe({"X-MBX-USED-WEIGHT-1M": "100"})
+        limiter.wait()
+        mock_sleep.assert_called_once()
+        assert 0 < mock_sleep.call_args[0][0] <= 60
+        # budget is reset after the pause
+        limiter.wait()
+        mock_sleep.assert_called_once()
+
+    def test_ignores_missing_header(self):
+        limiter = exp._WeightLimiter(max_weight_1m=100)
+        limiter.observe({})
+        assert limiter._used == 0
+
 # ---------------------------------------------------------------------------
 # fetch_klines (mocked, no network)
 # ---------------------------------------------------------------------------
@@ -380,6 +571,22 @@ class TestFetchKlines:
         assert result[0].open == "100"
         assert result[1].close == "110"
 
+    @patch("binance_ohlcv_exporter._request_with_retry")
+    def test_keeps_api_strings_verbatim(self, mock_req, tmp_path):
+        mock_req.return_value = [
+            [0, "0.00001230", "0.00001240", "0.00001220", "0.00001235", "123456.78000000",
+             3599999, "1.52000000", 7, "0.10000000", "0.00000120", "0"],
+        ]
+
+        result = exp.fetch_klines("PEPEUSDT", "1h", 0, 3_600_000, timeout=10, sleep_sec=0)
+        csv_path = str(tmp_path / "raw.csv")
+        exp.write_klines_csv(csv_path, result)
+
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            row = list(csv.reader(f))[1]
+        assert row[1:6] == ["0.00001230", "0.00001240", "0.00001220", "0.00001235", "123456.78000000"]
+        assert row[8] == "7"
+
     @patch("binance_ohlcv_exporter.time.sleep")
     @patch("binance_ohlcv_exporter._request_with_retry")
     def test_deduplication(self, mock_req, mock_sleep):
@@ -390,6 +597,131 @@ class TestFetchKlines:
         result = exp.fetch_klines("BTCUSDT", "1h", 0, 3_600_000, timeout=10, sleep_sec=0)
         assert len(result) == 1
 
+    @patch("binance_ohlcv_exporter.time.sleep")
+    @patch("binance_ohlcv_exporter._request_with_retry")
+    def test_deduplicates_across_page_boundary(self, mock_req, mock_sleep):
+        def row(t):
+            return [t, "1", "1", "1", "1", "1", t + 3_599_999, "1", 1, "1", "1", 0]
+
+        # Full first page, second page repeats its last candle
+        first = [row(i * 3_600_000) for i in range(1000)]
+        second = [first[-1], row(1000 * 3_600_000)]
+        mock_req.side_effect = [first, second]
+
+        result = exp.fetch_klines("BTCUSDT", "1h", 0, 1001 * 3_600_000, timeout=10, sleep_sec=0)
+        times = [k.open_time_ms for k in result]
+        assert len(times) == 1001
+        assert times == sorted(set(times))
+
+    @patch("binance_ohlcv_exporter.time.sleep")
+    @patch("binance_ohlcv_exporter._request_with_retry")
+    def test_no_extra_request_when_next_candle_is_past_end(self, mock_req, mock_sleep):
+        # Full page whose last candle is the last one that fits before end_ms
+        page = [
+            [i * 3_600_000, "1", "1", "1", "1", "1", (i + 1) * 3_600_000 - 1, "1", 1, "1", "1", 0]
+            for i in range(1000)
+        ]
+        mock_req.return_value = page
+        end_ms = 999 * 3_600_000 + 1_800_000  # mid-candle, before the 1001st open
+
+        result = exp.fetch_klines("BTCUSDT", "1h", 0, end_ms, timeout=10, sleep_sec=0)
+        assert len(result) == 1000
+        assert mock_req.call_count == 1
+
+    @patch("binance_ohlcv_exporter.time.sleep")
+    @patch("binance_ohlcv_exporter._request_with_retry")
+    def test_next_page_starts_at_next_candle(self, mock_req, mock_sleep):
+        page = [
+            [i * 3_600_000, "1", "1", "1", "1", "1", (i + 1) * 3_600_000 - 1, "1", 1, "1", "1", 0]
+            for i in range(1000)
+        ]
+        mock_req.side_effect = [page, []]
+
+        exp.fetch_klines("BTCUSDT", "1h", 0, 2000 * 3_600_000, timeout=10, sleep_sec=0)
+        second_params = mock_req.call_args_list[1][0][1]
+        assert second_params["startTime"] == 1000 * 3_600_000
+
+    @patch("binance_ohlcv_exporter._request_with_retry")
+    def test_cache_resumes_after_last_cached_candle(self, mock_req, tmp_path):
+        def row(i):
+            return [i * 3_600_000, "1", "1", "1", str(i), "1", (i + 1) * 3_600_000 - 1, "1", 1, "1", "1", "0"]
+
+        cache_dir = str(tmp_path / "_cache")
+
+        # First run: everything comes from the API and gets cached
+        mock_req.return_value = [row(0), row(1)]
+        first = exp.fetch_klines("BTCUSDT", "1h", 0, 3 * 3_600_000, timeout=10, sleep_sec=0, cache_dir=cache_dir)
+        assert [k.close for k in first] == ["0", "1"]
+        assert os.path.exists(os.path.join(cache_dir, "BTCUSDT_1h.json.gz"))
+
+        # Second run: only the tail after the cached candles is requested
+        mock_req.reset_mock()
+        mock_req.return_value = [row(2), row(3)]
+        second = exp.fetch_klines("BTCUSDT", "1h", 0, 3 * 3_600_000, timeout=10, sleep_sec=0, cache_dir=cache_dir)
+        assert [k.close for k in second] == ["0", "1", "2", "3"]
+        assert mock_req.call_count == 1
+        assert mock_req.call_args[0][1]["startTime"] == 2 * 3_600_000
+
+    @patch("binance_ohlcv_exporter._request_with_retry")
+    def test_cache_ignored_when_window_starts_earlier(self, mock_req, tmp_path):
+        row = [3_600_000, "1", "1", "1", "1", "1", 7_199_999, "1", 1, "1", "1", "0"]
+        cache_dir = str(tmp_path / "_cache")
+        os.makedirs(cache_dir)
+        exp._save_kline_cache(os.path.join(cache_dir, "BTCUSDT_1h.json.gz"), 3_600_000, [row])
+
+        mock_req.return_value = [[0, "2", "2", "2", "2", "2", 3_599_999, "2", 2, "2", "2", "0"], row]
+        result = exp.fetch_klines("BTCUSDT", "1h", 0, 3_600_000, timeout=10, sleep_sec=0, cache_dir=cache_dir)
+        assert len(result) == 2
+        assert mock_req.call_args[0][1]["startTime"] == 0
+
+    @patch("binance_ohlcv_exporter._request_with_retry")
+    def test_cache_never_skips_a_gap(self, mock_req, tmp_path):
+        def row(i):
+            return [i * 3_600_000, "1", "1", "1", str(i), "1", (i + 1) * 3_600_000 - 1, "1", 1, "1", "1", "0"]
+
+        def api(url, params, timeout):
+            lo, hi = params["startTime"], params["endTime"]
+            return [row(i) for i in range(13) if lo <= i * 3_600_000 <= hi]
+
+        mock_req.side_effect = api
+        cache_dir = str(tmp_path / "_cache")
+        h = 3_600_000
+
+        exp.fetch_klines("BTCUSDT", "1h", 0, 2 * h, timeout=10, sleep_sec=0, cache_dir=cache_dir)
+        # Window starts after a gap: the cache must not be extended across it
+        exp.fetch_klines("BTCUSDT", "1h", 10 * h, 12 * h, timeout=10, sleep_sec=0, cache_dir=cache_dir)
+        full = exp.fetch_klines("BTCUSDT", "1h", 0, 12 * h, timeout=10, sleep_sec=0, cache_dir=cache_dir)
+
+        assert [k.close for k in full] == [str(i) for i in range(13)]
+
+    @patch("binance_ohlcv_exporter._request_with_retry")
+    def test_cache_is_pruned_to_current_window(self, mock_req, tmp_path):
+        def row(i):
+            return [i * 3_600_000, "1", "1", "1", str(i), "1", (i + 1) * 3_600_000 - 1, "1", 1, "1", "1", "0"]
+
+        def api(url, params, timeout):
+            lo, hi = params["startTime"], params["endTime"]
+            return [row(i) for i in range(10) if lo <= i * 3_600_000 <= hi]
+
+        mock_req.side_effect = api
+        cache_dir = str(tmp_path / "_cache")
+        h = 3_600_000
+
+        exp.fetch_klines("BTCUSDT", "1h", 0, 5 * h, timeout=10, sleep_sec=0, cache_dir=cache_dir)
+        # Sliding window: starts later and extends further
+        result = exp.fetch_klines("BTCUSDT", "1h", 3 * h, 9 * h, timeout=10, sleep_sec=0, cache_dir=cache_dir)
+        assert [k.close for k in result] == [str(i) for i in range(3, 10)]
+
+        cached = exp._load_kline_cache(os.path.join(cache_dir, "BTCUSDT_1h.json.gz"))
+        assert cached["start_ms"] == 3 * h
+        assert [r[0] // h for r in cached["rows"]] == list(range(3, 10))
+
+    def test_cache_without_start_ms_is_a_miss(self, tmp_path):
+        path = str(tmp_path / "BTCUSDT_1h.json.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"rows": [[0, "1", "1", "1", "1", "1", 3_599_999, "1", 1, "1", "1", "0"]]}, f)
+        assert exp._load_kline_cache(path) is None
+
     @patch("binance_ohlcv_exporter._request_with_retry")
     def test_filters_beyond_end_ms(self, mock_req):
         mock_req.return_value = [
@@ -400,3 +732,132 @@ class TestFetchKlines:
         result = exp.fetch_klines("BTCUSDT", "1h", 0, 3_600_000, timeout=10, sleep_sec=0)
         assert len(result) == 1
         assert result[0].open_time_ms == 0
+
+
+# ---------------------------------------------------------------------------
+# export_symbol (mocked, no network)
+# ---------------------------------------------------------------------------
+
+class TestExportSymbol:
+    @patch("binance_ohlcv_exporter.iter_kline_pages")
+    def test_writes_csv_per_interval_and_returns_summary(self, mock_fetch, tmp_path):
+        mock_fetch.side_effect = lambda *a, **kw: iter([[_make_kline(open_time_ms=0)]])
+        for interval in ("1h", "4h"):
+            (tmp_path / f"klines_{interval}").mkdir()
+
+        row = exp.export_symbol("BTCUSDT", ["1h", "4h"], 0, 3_600_000, str(tmp_path), timeout=10, sleep_sec=0)
+
+        assert (tmp_path / "klines_1h" / "BTCUSDT_1h.csv").exists()
+        assert (tmp_path / "klines_4h" / "BTCUSDT_4h.csv").exists()
+        assert row is not None
+        assert row[0] == "BTCUSDT"
+        assert mock_fetch.call_count == 2
+
+    @patch("binance_ohlcv_exporter.iter_kline_pages")
+    def test_no_summary_without_1h(self, mock_fetch, tmp_path):
+        mock_fetch.side_effect = lambda *a, **kw: iter([[_make_kline(open_time_ms=0)]])
+        (tmp_path / "klines_4h").mkdir()
+
+        row = exp.export_symbol("BTCUSDT", ["4h"], 0, 3_600_000, str(tmp_path), timeout=10, sleep_sec=0)
+        assert row is None
+
+    @patch("binance_ohlcv_exporter.iter_kline_pages")
+    def test_failure_completes_progress_and_reraises(self, mock_fetch, tmp_path):
+        mock_fetch.side_effect = RuntimeError("boom")
+        pbar = MagicMock()
+
+        with pytest.raises(RuntimeError):
+            exp.export_symbol("BTCUSDT", ["1h", "4h"], 0, 3_600_000, str(tmp_path), timeout=10, sleep_sec=0, pbar=pbar)
+        pbar.update.assert_called_once_with(2)
+
+    @patch("binance_ohlcv_exporter.iter_kline_pages")
+    def test_failed_fetch_leaves_no_partial_csv(self, mock_fetch, tmp_path):
+        def pages(*args, **kwargs):
+            yield [_make_kline(open_time_ms=0)]
+            raise RuntimeError("network down")
+
+        mock_fetch.side_effect = pages
+        (tmp_path / "klines_1h").mkdir()
+
+        with pytest.raises(RuntimeError):
+            exp.export_symbol("BTCUSDT", ["1h"], 0, 3_600_000, str(tmp_path), timeout=10, sleep_sec=0)
+        assert os.listdir(tmp_path / "klines_1h") == []
+
+
+# ---------------------------------------------------------------------------
+# main (mocked export_symbol, no network)
+# ---------------------------------------------------------------------------
+
+class TestMain:
+    def test_summary_keeps_input_order_and_skips_failed(self, tmp_path, monkeypatch, caplog):
+        import threading
+
+        c_done = threading.Event()
+
+        def fake_export(symbol, *args, **kwargs):
+            if symbol == "AAAUSDT":
+                # finishes last: waits until CCCUSDT has completed
+                assert c_done.wait(timeout=5)
+                return [symbol, "1", "1", "1", "1"]
+            if symbol == "BBBUSDT":
+                raise RuntimeError("boom")
+            c_done.set()
+            return [symbol, "3", "3", "3", "3"]
+
+        monkeypatch.setattr(exp, "export_symbol", fake_export)
+        monkeypatch.setattr(sys, "argv", [
+            "exporter", "--symbols", "AAAUSDT", "BBBUSDT", "CCCUSDT",
+            "--out", str(tmp_path), "--concurrency", "3",
+        ])
+
+        with caplog.at_level("WARNING"):
+            exp.main()
+
+        with open(tmp_path / "summary_metrics.csv", newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        assert [r[0] for r in rows[1:]] == ["AAAUSDT", "CCCUSDT"]
+        assert "Failed symbols (1): BBBUSDT" in caplog.text
+
+    def test_pool_grows_with_concurrency(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(exp, "export_symbol", lambda symbol, *a, **kw: None)
+        monkeypatch.setattr(exp, "_SESSION", exp._make_session())
+        monkeypatch.setattr(sys, "argv", [
+            "exporter", "--symbols", "AAAUSDT", "--out", str(tmp_path), "--concurrency", "64",
+        ])
+
+        with patch.object(exp, "_mount_pool", wraps=exp._mount_pool) as mount:
+            exp.main()
+        mount.assert_called_once_with(exp._SESSION, 64)
+
+    def test_interrupt_cancels_queued_symbols(self, tmp_path, monkeypatch):
+        import threading
+
+        started = threading.Event()
+        release = threading.Event()
+        calls: list[str] = []
+
+        def fake_export(symbol, *args, **kwargs):
+            calls.append(symbol)
+            started.set()
+            release.wait(timeout=5)
+            return None
+
+        def interrupted_as_completed(futures):
+            # Simulates SIGINT arriving while main() waits for the first symbol
+            assert started.wait(timeout=5)
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(exp, "export_symbol", fake_export)
+        monkeypatch.setattr(exp, "as_completed", interrupted_as_completed)
+        monkeypatch.setattr(sys, "argv", [
+            "exporter", "--symbols", "S0USDT", "S1USDT", "S2USDT", "S3USDT",
+            "--out", str(tmp_path), "--concurrency", "1",
+        ])
+
+        try:
+            with pytest.raises(KeyboardInterrupt):
+                exp.main()
+        finally:
+            release.set()
+
+        assert calls == ["S0USDT"]